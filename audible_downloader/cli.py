@@ -1,23 +1,37 @@
 """Main CLI for audible-downloader."""
 
 import asyncio
-import json
+import functools
+import hashlib
+import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 
+import httpx
+import orjson
 from InquirerPy import inquirer
 from InquirerPy.base.control import Choice
 from rich.console import Console
+from rich.progress import Progress, BarColumn, DownloadColumn, TransferSpeedColumn
 from rich.table import Table
 
 import audible
 from audible_cli.models import Library
 
+from .utils import UNSAFE_FILENAME_RE, create_http_client, estimate_bitrate, stream_to_file
+
 console = Console()
 
 CONFIG_DIR = Path(".audible-downloader")
 DOWNLOADS_DIR = Path("downloads")
+MAX_PARALLEL_DOWNLOADS = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Resolved once at startup, so spawning ffmpeg per chapter skips the PATH lookup
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
 
 
 def setup_auth() -> audible.Authenticator:
@@ -75,7 +89,12 @@ async def fetch_library(auth: audible.Authenticator) -> Library:
     return library
 
 
-def display_library(library: Library):
+def library_authors(library: Library) -> list[str]:
+    """Get the author line for every book, computed once for both the table and the picker."""
+    return [", ".join([a["name"] for a in (item.authors or [])]) for item in library]
+
+
+def display_library(library: Library, authors: list[str]):
     """Display library as a table."""
     table = Table(title="Your Audible Library")
     table.add_column("#", style="dim", width=4)
@@ -83,24 +102,21 @@ def display_library(library: Library):
     table.add_column("Author", style="green")
     table.add_column("Length", style="yellow")
 
-    for i, item in enumerate(library, 1):
-        authors = ", ".join(a["name"] for a in (item.authors or []))
-        runtime = item.runtime_length_min or 0
-        hours, mins = divmod(runtime, 60)
+    for i, (item, item_authors) in enumerate(zip(library, authors), 1):
+        hours, mins = divmod(item.runtime_length_min or 0, 60)
         length = f"{hours}h {mins}m" if hours else f"{mins}m"
-        table.add_row(str(i), item.full_title[:60], authors[:30], length)
+        table.add_row(str(i), item.full_title[:60], item_authors[:30], length)
 
     console.print(table)
 
 
-def select_books(library: Library) -> list:
+def select_books(library: Library, authors: list[str]) -> list:
     """Interactive checkbox selection of books."""
-    choices = []
-    for i, item in enumerate(library):
-        authors = ", ".join(a["name"] for a in (item.authors or []))[:30]
-        title = item.full_title[:50]
-        label = f"{title} - {authors}"
-        choices.append(Choice(i, label))  # Store index, not item (items aren't picklable)
+    # Store index, not item (items aren't picklable)
+    choices = [
+        Choice(i, f"{item.full_title[:50]} - {item_authors[:30]}")
+        for i, (item, item_authors) in enumerate(zip(library, authors))
+    ]
 
     selected_indices = inquirer.checkbox(
         message="Select books to download (Space to select, Enter to confirm):",
@@ -111,87 +127,120 @@ def select_books(library: Library) -> list:
     return [library[i] for i in selected_indices]
 
 
-async def download_book(auth: audible.Authenticator, item, output_dir: Path) -> dict | None:
+async def verify_audio_file(http: httpx.AsyncClient, url, audio_file: Path, checksum_file: Path) -> bool:
+    """Check that a previously downloaded audio file is complete and intact."""
+    if checksum_file.exists():
+        def file_sha256() -> str:
+            with open(audio_file, "rb") as f:
+                return hashlib.file_digest(f, "sha256").hexdigest()
+
+        if await asyncio.to_thread(file_sha256) == checksum_file.read_text().strip():
+            return True
+        console.print(f"[yellow]Checksum mismatch, re-downloading: {audio_file}[/yellow]")
+        return False
+
+    # Downloaded before checksums were recorded - compare size with the server's
+    try:
+        resp = await http.head(str(url), follow_redirects=True)
+        expected = int(resp.headers.get("content-length", -1))
+    except (httpx.HTTPError, ValueError):
+        return False
+    if expected == audio_file.stat().st_size:
+        return True
+    console.print(f"[yellow]Incomplete download, re-downloading: {audio_file}[/yellow]")
+    return False
+
+
+async def download_book(
+    client: audible.AsyncClient, http: httpx.AsyncClient, item, output_dir: Path, progress: Progress
+) -> dict | None:
     """Download a single book with metadata."""
     console.print(f"\n[cyan]Downloading: {item.full_title}[/cyan]")
 
     book_dir = output_dir / item.full_title_slugify
     book_dir.mkdir(parents=True, exist_ok=True)
 
-    async with audible.AsyncClient(auth=auth) as client:
-        # Rebind item to client for API calls
-        item._client = client
+    # Rebind item to client for API calls
+    item._client = client
+
+    # Try AAXC first, then AAX
+    try:
+        url, codec, license_resp = await item.get_aaxc_url(quality="best")
+        is_aaxc = True
 
-        # Try AAXC first, then AAX
+        # Save voucher
+        voucher_file = book_dir / f"{item.full_title_slugify}.voucher"
+        voucher_file.write_bytes(orjson.dumps(license_resp, option=orjson.OPT_INDENT_2))
+
+    except Exception as e:
+        console.print(f"[yellow]AAXC not available, trying AAX: {e}[/yellow]")
         try:
-            url, codec, license_resp = await item.get_aaxc_url(quality="best")
-            is_aaxc = True
+            url, codec = await item.get_aax_url(quality="best")
+            is_aaxc = False
+        except Exception as e2:
+            console.print(f"[red]Failed to get download URL: {e2}[/red]")
+            return None
+
+    # Download audio file
+    ext = "aaxc" if is_aaxc else "aax"
+    audio_file = book_dir / f"{item.full_title_slugify}.{ext}"
+    checksum_file = book_dir / f"{item.full_title_slugify}.{ext}.sha256"
+
+    if audio_file.exists() and await verify_audio_file(http, url, audio_file, checksum_file):
+        console.print(f"[yellow]Audio file already exists: {audio_file}[/yellow]")
+    else:
+        console.print(f"[dim]Downloading from: {url}[/dim]")
 
-            # Save voucher
-            voucher_file = book_dir / f"{item.full_title_slugify}.voucher"
-            with open(voucher_file, "w") as f:
-                json.dump(license_resp, f, indent=2)
+        digest = hashlib.sha256()
 
-        except Exception as e:
-            console.print(f"[yellow]AAXC not available, trying AAX: {e}[/yellow]")
+        def write_chunk(f, chunk: bytes):
+            f.write(chunk)
+            digest.update(chunk)
+
+        async with http.stream("GET", str(url), follow_redirects=True) as resp:
+            resp.raise_for_status()
+            total = int(resp.headers.get("content-length", 0))
+
+            # Shared progress display - one task per concurrent download
+            task = progress.add_task(item.full_title[:40], total=total)
+
+            async def on_chunk(downloaded: int):
+                progress.update(task, completed=downloaded)
+
+            with open(audio_file, "wb") as f:
+                await stream_to_file(resp, functools.partial(write_chunk, f), DOWNLOAD_CHUNK_SIZE, on_chunk)
+
+        # Only written once the download is complete, so a partial file never verifies
+        checksum_file.write_text(digest.hexdigest())
+
+    # Get chapter info
+    try:
+        metadata = await item.get_content_metadata(quality="best")
+        chapter_info = metadata.get("content_metadata", {}).get("chapter_info", {})
+        if chapter_info:
+            chapters_file = book_dir / f"{item.full_title_slugify}-chapters.json"
+            chapters_file.write_bytes(orjson.dumps(chapter_info, option=orjson.OPT_INDENT_2))
+    except Exception as e:
+        console.print(f"[yellow]Could not get chapter info: {e}[/yellow]")
+        chapter_info = None
+
+    # Download cover
+    cover_url = item.get_cover_url(res=500)
+    if cover_url:
+        cover_file = book_dir / f"{item.full_title_slugify}.jpg"
+        if not cover_file.exists():
+            # Stream to a temp file and rename, so a failed download never leaves a partial cover
+            part_file = cover_file.with_suffix(".jpg.part")
             try:
-                url, codec = await item.get_aax_url(quality="best")
-                is_aaxc = False
-            except Exception as e2:
-                console.print(f"[red]Failed to get download URL: {e2}[/red]")
-                return None
-
-        # Download audio file
-        ext = "aaxc" if is_aaxc else "aax"
-        audio_file = book_dir / f"{item.full_title_slugify}.{ext}"
-
-        if audio_file.exists():
-            console.print(f"[yellow]Audio file already exists: {audio_file}[/yellow]")
-        else:
-            console.print(f"[dim]Downloading from: {url}[/dim]")
-            import httpx
-            from rich.progress import Progress, BarColumn, DownloadColumn, TransferSpeedColumn
-
-            async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None)) as http_client:
-                async with http_client.stream("GET", str(url), follow_redirects=True) as resp:
-                    total = int(resp.headers.get("content-length", 0))
-
-                    with Progress(
-                        "[progress.description]{task.description}",
-                        BarColumn(),
-                        DownloadColumn(),
-                        TransferSpeedColumn(),
-                    ) as progress:
-                        task = progress.add_task("Downloading", total=total)
-
-                        with open(audio_file, "wb") as f:
-                            async for chunk in resp.aiter_bytes(chunk_size=8192):
-                                f.write(chunk)
-                                progress.update(task, advance=len(chunk))
-
-        # Get chapter info
-        try:
-            metadata = await item.get_content_metadata(quality="best")
-            chapter_info = metadata.get("content_metadata", {}).get("chapter_info", {})
-            if chapter_info:
-                chapters_file = book_dir / f"{item.full_title_slugify}-chapters.json"
-                with open(chapters_file, "w") as f:
-                    json.dump(chapter_info, f, indent=2)
-        except Exception as e:
-            console.print(f"[yellow]Could not get chapter info: {e}[/yellow]")
-            chapter_info = None
-
-        # Download cover
-        cover_url = item.get_cover_url(res=500)
-        if cover_url:
-            cover_file = book_dir / f"{item.full_title_slugify}.jpg"
-            if not cover_file.exists():
-                try:
-                    async with httpx.AsyncClient() as http_client:
-                        resp = await http_client.get(cover_url)
-                        cover_file.write_bytes(resp.content)
-                except Exception as e:
-                    console.print(f"[yellow]Could not download cover: {e}[/yellow]")
+                async with http.stream("GET", cover_url, follow_redirects=True) as resp:
+                    resp.raise_for_status()
+                    with open(part_file, "wb") as f:
+                        async for chunk in resp.aiter_bytes(chunk_size=65536):
+                            f.write(chunk)
+                os.replace(part_file, cover_file)
+            except Exception as e:
+                part_file.unlink(missing_ok=True)
+                console.print(f"[yellow]Could not download cover: {e}[/yellow]")
 
     result = {
         "audio_file": audio_file,
@@ -226,7 +275,36 @@ def get_activation_bytes(auth: audible.Authenticator) -> str | None:
     return None
 
 
-def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
+def safe_filename(name: str) -> str:
+    """Strip everything but letters, digits, spaces, dashes and underscores."""
+    return UNSAFE_FILENAME_RE.sub("", name).strip()
+
+
+async def run_command(cmd: list[str], capture: bool = False) -> bytes:
+    """Run a subprocess without blocking the event loop, raising CalledProcessError on failure.
+
+    stderr is always captured and only printed on failure, so concurrent ffmpeg runs
+    never write over the live progress display.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode:
+        if stderr:
+            console.print(stderr.decode(errors="replace").rstrip(), markup=False, highlight=False)
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return stdout or b""
+
+
+async def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
     """Convert downloaded AAX/AAXC to MP3 with chapter splitting."""
     audio_file: Path = download_result["audio_file"]
     book_dir: Path = download_result["book_dir"]
@@ -235,13 +313,6 @@ def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
 
     console.print(f"\n[cyan]Converting: {item.full_title}[/cyan]")
 
-    # Check ffmpeg
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        console.print("[red]ffmpeg not found. Please install ffmpeg.[/red]")
-        return False
-
     # Build decryption parameters
     if is_aaxc:
         key = download_result.get("key")
@@ -260,38 +331,44 @@ def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
     chapters_file = book_dir / f"{item.full_title_slugify}-chapters.json"
     chapters = []
     if chapters_file.exists():
-        with open(chapters_file) as f:
-            chapter_data = json.load(f)
-            chapters = chapter_data.get("chapters", [])
-
-    # Get audio metadata with ffprobe
-    probe_cmd = [
-        "ffprobe", "-v", "quiet", "-print_format", "json",
-        "-show_format", "-show_chapters",
-        *decrypt_params, "-i", str(audio_file)
-    ]
+        chapter_data = orjson.loads(chapters_file.read_bytes())
+        chapters = chapter_data.get("chapters", [])
 
-    try:
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-        probe_data = json.loads(result.stdout)
-    except Exception as e:
-        console.print(f"[yellow]ffprobe failed, using basic conversion: {e}[/yellow]")
-        probe_data = {}
-
-    # Extract metadata
-    format_info = probe_data.get("format", {})
-    tags = format_info.get("tags", {})
-    title = tags.get("title", item.title or "Unknown")
-    artist = tags.get("artist", "")
-    album = tags.get("album", title)
-    genre = tags.get("genre", "Audiobook")
-
-    # Get bitrate
-    bitrate = format_info.get("bit_rate", "128000")
-    try:
-        bitrate = f"{int(bitrate) // 1000}k"
-    except (ValueError, TypeError):
-        bitrate = "128k"
+    bitrate = estimate_bitrate(audio_file, item.runtime_length_min)
+
+    if item.title and item.authors and bitrate:
+        # Audible API already gave us everything - no need to decrypt the file with ffprobe
+        title = item.title
+        artist = ", ".join(a["name"] for a in item.authors)
+        album = item.full_title
+        genre = "Audiobook"
+    else:
+        # Get audio metadata with ffprobe
+        probe_cmd = [
+            FFPROBE, "-v", "quiet", "-print_format", "json",
+            "-show_format", *decrypt_params, "-i", str(audio_file)
+        ]
+
+        try:
+            probe_data = orjson.loads(await run_command(probe_cmd, capture=True))
+        except Exception as e:
+            console.print(f"[yellow]ffprobe failed, using basic conversion: {e}[/yellow]")
+            probe_data = {}
+
+        # Extract metadata
+        format_info = probe_data.get("format", {})
+        tags = format_info.get("tags", {})
+        title = tags.get("title", item.title or "Unknown")
+        artist = tags.get("artist", "")
+        album = tags.get("album", title)
+        genre = tags.get("genre", "Audiobook")
+
+        # Get bitrate
+        bitrate = format_info.get("bit_rate", "128000")
+        try:
+            bitrate = f"{int(bitrate) // 1000}k"
+        except (ValueError, TypeError):
+            bitrate = "128k"
 
     # Output directory for MP3s
     mp3_dir = book_dir / "mp3"
@@ -301,48 +378,85 @@ def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
     if chapters:
         console.print(f"[dim]Splitting into {len(chapters)} chapters...[/dim]")
 
+        outputs = []
         for i, chapter in enumerate(chapters, 1):
             chapter_title = chapter.get("title", f"Chapter {i}")
-            # Clean chapter title for filename
-            safe_title = "".join(c for c in chapter_title if c.isalnum() or c in " -_").strip()
+            outputs.append((chapter_title, mp3_dir / f"{i:03d} - {safe_filename(chapter_title)}.mp3"))
+
+        if all(output_file.exists() for _, output_file in outputs):
+            console.print("[dim]All chapters already converted, skipping[/dim]")
+            return True
 
-            start_ms = chapter.get("start_offset_ms", 0)
-            length_ms = chapter.get("length_ms", 0)
-            start_sec = start_ms / 1000
-            end_sec = (start_ms + length_ms) / 1000
+        # Decrypt and encode the whole book in one pass, cutting at each chapter start
+        # (a single chapter is cut at its end so the segment list is never empty)
+        cut_points = [c.get("start_offset_ms", 0) / 1000 for c in chapters[1:]]
+        if not cut_points:
+            cut_points = [(chapters[0].get("start_offset_ms", 0) + chapters[0].get("length_ms", 0)) / 1000]
+        segment_pattern = mp3_dir / "segment-%03d.mp3"
+
+        cmd = [
+            FFMPEG, "-v", "error",
+            *decrypt_params,
+            "-i", str(audio_file),
+            "-vn",  # No video
+            "-codec:a", "libmp3lame",
+            "-ab", bitrate,
+            "-map_metadata", "-1",
+            "-f", "segment",
+            "-segment_times", ",".join(str(t) for t in cut_points),
+            "-reset_timestamps", "1",
+            "-y",
+            str(segment_pattern)
+        ]
 
-            output_file = mp3_dir / f"{i:03d} - {safe_title}.mp3"
+        try:
+            await run_command(cmd)
+        except subprocess.CalledProcessError as e:
+            console.print(f"[red]Failed to convert: {e}[/red]")
+            return False
 
-            if output_file.exists():
-                console.print(f"[dim]Skipping existing: {output_file.name}[/dim]")
-                continue
+        # Tag and rename each segment (stream copy, no re-encode), several at a time
+        sem = asyncio.Semaphore(os.cpu_count() or 4)
+        book_tags = [
+            "-metadata", f"artist={artist}",
+            "-metadata", f"album={album}",
+            "-metadata", f"genre={genre}",
+        ]
 
-            console.print(f"[dim]  Chapter {i}/{len(chapters)}: {chapter_title}[/dim]")
+        async def tag_chapter(i: int, chapter_title: str, output_file: Path):
+            segment_file = mp3_dir / f"segment-{i - 1:03d}.mp3"
+            if not segment_file.exists():
+                console.print(f"[red]Missing segment for chapter {i}: {chapter_title}[/red]")
+                return
 
             cmd = [
-                "ffmpeg", "-v", "error", "-stats",
-                *decrypt_params,
-                "-i", str(audio_file),
-                "-ss", str(start_sec),
-                "-to", str(end_sec),
-                "-vn",  # No video
-                "-codec:a", "libmp3lame",
-                "-ab", bitrate,
+                FFMPEG, "-v", "error",
+                "-i", str(segment_file),
+                "-codec", "copy",
                 "-map_metadata", "-1",
                 "-metadata", f"title={chapter_title}",
-                "-metadata", f"artist={artist}",
-                "-metadata", f"album={album}",
                 "-metadata", f"track={i}/{len(chapters)}",
-                "-metadata", f"genre={genre}",
+                *book_tags,
                 "-y",
                 str(output_file)
             ]
 
-            try:
-                subprocess.run(cmd, check=True)
-            except subprocess.CalledProcessError as e:
-                console.print(f"[red]Failed to convert chapter {i}: {e}[/red]")
-                continue
+            async with sem:
+                try:
+                    await run_command(cmd)
+                except subprocess.CalledProcessError as e:
+                    console.print(f"[red]Failed to tag chapter {i}: {e}[/red]")
+                    return
+            segment_file.unlink()
+
+        await asyncio.gather(*(
+            tag_chapter(i, chapter_title, output_file)
+            for i, (chapter_title, output_file) in enumerate(outputs, 1)
+        ))
+
+        # Drop any trailing segment past the last chapter
+        for segment_file in mp3_dir.glob("segment-*.mp3"):
+            segment_file.unlink()
 
         console.print(f"[green]Created {len(chapters)} MP3 files in {mp3_dir}[/green]")
 
@@ -352,7 +466,7 @@ def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
         output_file = mp3_dir / f"{item.full_title_slugify}.mp3"
 
         cmd = [
-            "ffmpeg", "-v", "error", "-stats",
+            FFMPEG, "-v", "error",
             *decrypt_params,
             "-i", str(audio_file),
             "-vn",
@@ -368,7 +482,7 @@ def convert_to_mp3(download_result: dict, activation_bytes: str | None) -> bool:
         ]
 
         try:
-            subprocess.run(cmd, check=True)
+            await run_command(cmd)
             console.print(f"[green]Created: {output_file}[/green]")
         except subprocess.CalledProcessError as e:
             console.print(f"[red]Failed to convert: {e}[/red]")
@@ -382,10 +496,36 @@ async def main_async(auth: audible.Authenticator, selected: list, activation_byt
     # Download and convert
     DOWNLOADS_DIR.mkdir(exist_ok=True)
 
-    for item in selected:
-        result = await download_book(auth, item, DOWNLOADS_DIR)
-        if result:
-            convert_to_mp3(result, activation_bytes)
+    download_sem = asyncio.Semaphore(MAX_PARALLEL_DOWNLOADS)
+    convert_sem = asyncio.Semaphore(os.cpu_count() or 4)
+
+    async with (
+        audible.AsyncClient(auth=auth) as client,
+        create_http_client(max_connections=32) as http,
+    ):
+        with Progress(
+            "[progress.description]{task.description}",
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+        ) as progress:
+
+            async def process(item):
+                try:
+                    async with download_sem:
+                        result = await download_book(client, http, item, DOWNLOADS_DIR, progress)
+                    # Download slot is free again - convert while other books keep downloading
+                    if result:
+                        async with convert_sem:
+                            await convert_to_mp3(result, activation_bytes)
+                except Exception as e:
+                    # One book failing shouldn't stop the others
+                    console.print(f"[red]Failed to process {item.full_title}: {e}[/red]")
+
+            # Ctrl-C cancels every download and ffmpeg still in flight
+            async with asyncio.TaskGroup() as tg:
+                for item in selected:
+                    tg.create_task(process(item))
 
     console.print("\n[bold green]Done![/bold green]")
 
@@ -396,6 +536,10 @@ def main():
         console.print("\n[bold cyan]Audible Downloader[/bold cyan]")
         console.print("[dim]Download and convert Audible books to MP3[/dim]\n")
 
+        if not FFMPEG:
+            console.print("[red]ffmpeg not found. Please install ffmpeg.[/red]")
+            sys.exit(1)
+
         # Load or create auth (sync - interactive prompts)
         auth = load_auth()
 
@@ -407,8 +551,9 @@ def main():
             return
 
         # Display and select books (sync - interactive prompts)
-        display_library(library)
-        selected = select_books(library)
+        authors = library_authors(library)
+        display_library(library, authors)
+        selected = select_books(library, authors)
 
         if not selected:
             console.print("[yellow]No books selected.[/yellow]")
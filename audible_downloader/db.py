@@ -1,7 +1,9 @@
 """SQLite database for users, books, and jobs."""
 
-import json
 import sqlite3
+import threading
+import time
+import zlib
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
@@ -9,8 +11,16 @@ from enum import Enum
 from pathlib import Path
 from typing import Optional
 
+import orjson
+
 DB_PATH = Path("data/audible.db")
 
+# Seconds a get_user_by_id result is reused before re-reading the database
+USER_CACHE_TTL = 60
+
+# Minimum seconds between progress writes for the same job (see update_job_progress)
+PROGRESS_INTERVAL = 0.5
+
 
 class JobStatus(str, Enum):
     PENDING = "pending"
@@ -28,15 +38,26 @@ class JobStage(str, Enum):
     FAILED = "failed"
 
 
-@dataclass
+class OutputFormat(str, Enum):
+    MP3 = "mp3"  # Re-encoded with libmp3lame
+    M4A = "m4a"  # Original AAC audio, copied without re-encoding
+
+
+@dataclass(slots=True, frozen=True)
 class User:
     id: int
     email: str
-    auth_data: dict
+    auth_data_raw: str
     created_at: datetime
+    output_format: OutputFormat = OutputFormat.MP3
+
+    @property
+    def auth_data(self) -> dict:
+        """Decoded auth data. A fresh dict per access, since Authenticator.from_dict pops keys from it."""
+        return orjson.loads(self.auth_data_raw)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Book:
     id: int
     user_id: int
@@ -47,7 +68,7 @@ class Book:
     created_at: datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Job:
     id: int
     user_id: int
@@ -62,17 +83,62 @@ class Job:
     completed_at: Optional[datetime]
 
 
+# Explicit column lists in dataclass field order, so rows (plain tuples) can be unpacked positionally
+# (SELECT * order differs on databases migrated with ALTER TABLE)
+_BOOK_COLUMNS = "id, user_id, asin, title, author, path, created_at"
+_JOB_COLUMNS = (
+    "id, user_id, asin, title, status, stage, progress, progress_detail, error, created_at, completed_at"
+)
+
+# Enum lookups by value, cheaper than calling the Enum constructor per row
+_JOB_STATUSES = {status.value: status for status in JobStatus}
+_JOB_STAGES = {stage.value: stage for stage in JobStage}
+
+# Status value stored alongside each stage by update_job_stage
+_STAGE_STATUS = {
+    JobStage.PENDING_DOWNLOAD: JobStatus.PENDING.value,
+    JobStage.DOWNLOADING: JobStatus.RUNNING.value,
+    JobStage.PENDING_CONVERT: JobStatus.PENDING.value,
+    JobStage.CONVERTING: JobStatus.RUNNING.value,
+    JobStage.COMPLETED: JobStatus.COMPLETED.value,
+    JobStage.FAILED: JobStatus.FAILED.value,
+}
+
+# User id -> (expiry, User) for get_user_by_id
+_user_cache: dict[int, tuple[float, User]] = {}
+
+# zlib level for the library_cache blob; library JSON is very repetitive, so even
+# the fastest level shrinks it several times over
+LIBRARY_CACHE_COMPRESSION = 1
+
+# User id -> decoded library_cache contents, see get_library_cache
+_library_memo: dict[int, list[dict]] = {}
+
+# Time of the last progress write per job id
+_progress_written: dict[int, float] = {}
+
+# Set when a job enters a pending stage, waking the worker blocked in wait_for_job
+_job_events = {
+    JobStage.PENDING_DOWNLOAD: threading.Event(),
+    JobStage.PENDING_CONVERT: threading.Event(),
+}
+
+
 def init_db():
     """Initialize the database schema."""
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    with get_db() as conn:
+    with get_writer() as conn:
+        # Journal mode is stored in the database file, so it only needs setting once
+        conn.execute("PRAGMA journal_mode=WAL")
+
         conn.executescript("""
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 email TEXT UNIQUE NOT NULL,
                 auth_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                output_format TEXT DEFAULT 'mp3'
             );
 
             CREATE TABLE IF NOT EXISTS books (
@@ -103,7 +169,6 @@ def init_db():
                 UNIQUE(user_id, asin)
             );
 
-            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
             CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs(user_id);
             CREATE INDEX IF NOT EXISTS idx_books_user ON books(user_id);
 
@@ -119,6 +184,7 @@ def init_db():
         migrations = [
             "ALTER TABLE jobs ADD COLUMN stage TEXT DEFAULT 'pending_download'",
             "ALTER TABLE jobs ADD COLUMN progress_detail TEXT",
+            "ALTER TABLE users ADD COLUMN output_format TEXT DEFAULT 'mp3'",
         ]
         for sql in migrations:
             try:
@@ -126,6 +192,14 @@ def init_db():
             except sqlite3.OperationalError:
                 pass  # Column already exists
 
+        # Job queue dequeue (get_job_by_stage) filters on stage and orders by created_at;
+        # this replaces the old status-only index, which no query used
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_stage_created ON jobs(stage, created_at)")
+        conn.execute("DROP INDEX IF EXISTS idx_jobs_status")
+
+        # Orphan cleanup (get_all_book_paths) reads every set path; answered from this index alone
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_books_path ON books(path) WHERE path IS NOT NULL")
+
         # Unique index (will fail if duplicates exist - clean them up first)
         try:
             conn.execute("CREATE UNIQUE INDEX idx_jobs_user_asin ON jobs(user_id, asin)")
@@ -133,160 +207,213 @@ def init_db():
             pass  # Index already exists or duplicates exist
 
 
+# One connection per thread (web event loop, download worker, convert worker), reused across calls
+_local = threading.local()
+
+# Compiled statements kept per connection. Every query here is a fixed string, so with
+# long-lived connections the whole working set stays prepared and is never re-parsed
+STATEMENT_CACHE_SIZE = 256
+
+# Serializes write transactions across threads, so a read-then-write transaction never
+# fails with SQLITE_BUSY trying to upgrade past another thread's commit
+_write_lock = threading.RLock()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a new database connection with per-connection tuning (WAL is set in init_db)."""
+    conn = sqlite3.connect(
+        DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.executescript("""
+        PRAGMA synchronous=NORMAL;
+        PRAGMA busy_timeout=5000;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+        PRAGMA cache_size=-65536;
+    """)
+    return conn
+
+
 @contextmanager
 def get_db():
-    """Get a database connection."""
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA busy_timeout=5000")
+    """Get this thread's database connection for reads. Commits on success, rolls back on error."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
     try:
         yield conn
         conn.commit()
-    finally:
-        conn.close()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def get_writer():
+    """Get this thread's database connection for a write transaction."""
+    with _write_lock, get_db() as conn:
+        yield conn
 
 
 # User operations
 
 def get_or_create_user(email: str, auth_data: dict) -> User:
-    """Get existing user or create new one."""
-    with get_db() as conn:
-        # Try to get existing user
+    """Get existing user (refreshing their auth data) or create new one."""
+    auth_data_raw = orjson.dumps(auth_data).decode()
+    with get_writer() as conn:
         row = conn.execute(
-            "SELECT * FROM users WHERE email = ?", (email,)
+            """INSERT INTO users (email, auth_data) VALUES (?, ?)
+               ON CONFLICT(email) DO UPDATE SET auth_data = excluded.auth_data
+               RETURNING id, email, created_at, output_format""",
+            (email, auth_data_raw)
         ).fetchone()
-
-        if row:
-            # Update auth data
-            conn.execute(
-                "UPDATE users SET auth_data = ? WHERE id = ?",
-                (json.dumps(auth_data), row["id"])
-            )
-            return User(
-                id=row["id"],
-                email=row["email"],
-                auth_data=auth_data,
-                created_at=row["created_at"]
-            )
-
-        # Create new user
-        cursor = conn.execute(
-            "INSERT INTO users (email, auth_data) VALUES (?, ?)",
-            (email, json.dumps(auth_data))
-        )
-        return User(
-            id=cursor.lastrowid,
-            email=email,
-            auth_data=auth_data,
-            created_at=datetime.now()
-        )
+        user_id, email, created_at, output_format = row
+        _user_cache.pop(user_id, None)
+        return User(user_id, email, auth_data_raw, created_at, OutputFormat(output_format))
 
 
 def get_user_by_id(user_id: int) -> Optional[User]:
-    """Get user by ID."""
+    """Get user by ID. Cached for USER_CACHE_TTL seconds, since every request looks it up."""
+    cached = _user_cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     with get_db() as conn:
         row = conn.execute(
-            "SELECT * FROM users WHERE id = ?", (user_id,)
+            "SELECT email, auth_data, created_at, output_format FROM users WHERE id = ?", (user_id,)
         ).fetchone()
 
         if row:
-            return User(
-                id=row["id"],
-                email=row["email"],
-                auth_data=json.loads(row["auth_data"]),
-                created_at=row["created_at"]
-            )
+            email, auth_data_raw, created_at, output_format = row
+            user = User(user_id, email, auth_data_raw, created_at, OutputFormat(output_format))
+            _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, user)
+            return user
     return None
 
 
+def set_user_output_format(user_id: int, output_format: OutputFormat):
+    """Set the audio format a user's books are converted to."""
+    with get_writer() as conn:
+        conn.execute(
+            "UPDATE users SET output_format = ? WHERE id = ?",
+            (output_format.value, user_id)
+        )
+    _user_cache.pop(user_id, None)
+
+
 # Book operations
 
 def get_user_books(user_id: int) -> list[Book]:
     """Get all books for a user."""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT * FROM books WHERE user_id = ? ORDER BY created_at DESC",
+            f"SELECT {_BOOK_COLUMNS} FROM books WHERE user_id = ? ORDER BY created_at DESC",
             (user_id,)
         ).fetchall()
 
-        return [
-            Book(
-                id=row["id"],
-                user_id=row["user_id"],
-                asin=row["asin"],
-                title=row["title"],
-                author=row["author"],
-                path=row["path"],
-                created_at=row["created_at"]
-            )
-            for row in rows
-        ]
+        return [_row_to_book(row) for row in rows]
+
+
+def get_user_book_paths(user_id: int) -> dict[str, Optional[str]]:
+    """Get {asin: path} for all of a user's downloaded books."""
+    with get_db() as conn:
+        return dict(conn.execute(
+            "SELECT asin, path FROM books WHERE user_id = ?",
+            (user_id,)
+        ).fetchall())
 
 
 def get_book(user_id: int, asin: str) -> Optional[Book]:
     """Get a specific book."""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT * FROM books WHERE user_id = ? AND asin = ?",
+            f"SELECT {_BOOK_COLUMNS} FROM books WHERE user_id = ? AND asin = ?",
             (user_id, asin)
         ).fetchone()
 
         if row:
-            return Book(
-                id=row["id"],
-                user_id=row["user_id"],
-                asin=row["asin"],
-                title=row["title"],
-                author=row["author"],
-                path=row["path"],
-                created_at=row["created_at"]
-            )
+            return _row_to_book(row)
     return None
 
 
+def _row_to_book(row) -> Book:
+    """Convert a database row (selected with _BOOK_COLUMNS) to a Book object."""
+    return Book(*row)
+
+
 def save_book(user_id: int, asin: str, title: str, author: str, path: str) -> Book:
     """Save a downloaded book."""
-    with get_db() as conn:
-        cursor = conn.execute(
-            """INSERT INTO books (user_id, asin, title, author, path)
+    with get_writer() as conn:
+        row = conn.execute(
+            f"""INSERT INTO books (user_id, asin, title, author, path)
                VALUES (?, ?, ?, ?, ?)
-               ON CONFLICT(user_id, asin) DO UPDATE SET path = ?, title = ?, author = ?""",
-            (user_id, asin, title, author, path, path, title, author)
-        )
-        return get_book(user_id, asin)
+               ON CONFLICT(user_id, asin) DO UPDATE SET
+                   path = excluded.path, title = excluded.title, author = excluded.author
+               RETURNING {_BOOK_COLUMNS}""",
+            (user_id, asin, title, author, path)
+        ).fetchone()
+        return _row_to_book(row)
 
 
 # Job operations
 
 def create_job(user_id: int, asin: str, title: str) -> Optional[Job]:
     """Create a new download job. Returns None if active job already exists."""
-    with get_db() as conn:
-        # Check for existing active job
-        existing = conn.execute(
-            "SELECT id FROM jobs WHERE user_id = ? AND asin = ? AND stage NOT IN (?, ?)",
-            (user_id, asin, JobStage.COMPLETED.value, JobStage.FAILED.value)
-        ).fetchone()
-        if existing:
-            return None
+    jobs = create_jobs(user_id, [(asin, title)])
+    return jobs[0] if jobs else None
 
-        cursor = conn.execute(
-            "INSERT INTO jobs (user_id, asin, title, status, stage) VALUES (?, ?, ?, ?, ?)",
-            (user_id, asin, title, JobStatus.PENDING.value, JobStage.PENDING_DOWNLOAD.value)
-        )
-        return Job(
-            id=cursor.lastrowid,
-            user_id=user_id,
-            asin=asin,
-            title=title,
-            status=JobStatus.PENDING,
-            stage=JobStage.PENDING_DOWNLOAD,
-            progress=0,
-            progress_detail=None,
-            error=None,
-            created_at=datetime.now(),
-            completed_at=None
-        )
+
+def create_jobs(user_id: int, books: list[tuple[str, str]]) -> list[Job]:
+    """Create download jobs for (asin, title) pairs in a single transaction.
+
+    Books that already have a job (active, or finished but not deleted) are skipped.
+    """
+    with get_writer() as conn:
+        # Check for existing active jobs
+        active = {
+            asin for (asin,) in conn.execute(
+                "SELECT asin FROM jobs WHERE user_id = ? AND stage NOT IN (?, ?)",
+                (user_id, JobStage.COMPLETED.value, JobStage.FAILED.value)
+            )
+        }
+
+        new_status, new_stage = JobStatus.PENDING.value, JobStage.PENDING_DOWNLOAD.value
+        jobs = []
+        for asin, title in books:
+            if asin in active:
+                continue
+            active.add(asin)
+
+            row = conn.execute(
+                f"""INSERT INTO jobs (user_id, asin, title, status, stage) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT DO NOTHING RETURNING {_JOB_COLUMNS}""",
+                (user_id, asin, title, new_status, new_stage)
+            ).fetchone()
+            if row:
+                jobs.append(_row_to_job(row))
+
+    # After the commit, so the woken worker can see the new jobs
+    if jobs:
+        notify_job(JobStage.PENDING_DOWNLOAD)
+    return jobs
+
+
+def notify_job(stage: JobStage):
+    """Wake the worker waiting for jobs at this stage."""
+    event = _job_events.get(stage)
+    if event:
+        event.set()
+
+
+def wait_for_job(stage: JobStage, timeout: float):
+    """Block until a job enters this stage or timeout seconds pass.
+
+    Only jobs queued by this process wake it early; jobs queued by another process
+    (e.g. batch_download.py) are picked up once the timeout expires.
+    """
+    event = _job_events[stage]
+    event.wait(timeout)
+    event.clear()
 
 
 def get_pending_job() -> Optional[Job]:
@@ -298,7 +425,7 @@ def get_job_by_stage(stage: JobStage) -> Optional[Job]:
     """Get the next job at a specific stage."""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT * FROM jobs WHERE stage = ? ORDER BY created_at ASC LIMIT 1",
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE stage = ? ORDER BY created_at ASC LIMIT 1",
             (stage.value,)
         ).fetchone()
 
@@ -308,19 +435,13 @@ def get_job_by_stage(stage: JobStage) -> Optional[Job]:
 
 
 def _row_to_job(row) -> Job:
-    """Convert a database row to a Job object."""
+    """Convert a database row (selected with _JOB_COLUMNS) to a Job object."""
+    job_id, user_id, asin, title, status, stage, progress, progress_detail, error, created_at, completed_at = row
     return Job(
-        id=row["id"],
-        user_id=row["user_id"],
-        asin=row["asin"],
-        title=row["title"],
-        status=JobStatus(row["status"]),
-        stage=JobStage(row["stage"]) if row["stage"] else JobStage.PENDING_DOWNLOAD,
-        progress=row["progress"],
-        progress_detail=row["progress_detail"] if "progress_detail" in row.keys() else None,
-        error=row["error"],
-        created_at=row["created_at"],
-        completed_at=row["completed_at"]
+        job_id, user_id, asin, title,
+        _JOB_STATUSES[status],
+        _JOB_STAGES[stage] if stage else JobStage.PENDING_DOWNLOAD,
+        progress, progress_detail, error, created_at, completed_at
     )
 
 
@@ -328,16 +449,43 @@ def get_user_jobs(user_id: int) -> list[Job]:
     """Get all jobs for a user."""
     with get_db() as conn:
         rows = conn.execute(
-            "SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC",
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE user_id = ? ORDER BY created_at DESC",
             (user_id,)
         ).fetchall()
 
         return [_row_to_job(row) for row in rows]
 
 
+def get_user_jobs_dicts(user_id: int) -> list[dict]:
+    """Get all jobs for a user as dicts for the JSON API, without building Job objects."""
+    with get_db() as conn:
+        rows = conn.execute(
+            """SELECT id, asin, title, status, COALESCE(stage, ?), progress, progress_detail, error,
+                      created_at, completed_at
+               FROM jobs WHERE user_id = ? ORDER BY created_at DESC""",
+            (JobStage.PENDING_DOWNLOAD.value, user_id)
+        ).fetchall()
+
+    return [
+        {
+            "id": job_id,
+            "asin": asin,
+            "title": title,
+            "status": status,
+            "stage": stage,
+            "progress": progress,
+            "progress_detail": progress_detail,
+            "error": error,
+            "created_at": created_at,
+            "completed_at": completed_at
+        }
+        for job_id, asin, title, status, stage, progress, progress_detail, error, created_at, completed_at in rows
+    ]
+
+
 def update_job_status(job_id: int, status: JobStatus, progress: int = None, error: str = None):
     """Update job status (legacy)."""
-    with get_db() as conn:
+    with get_writer() as conn:
         if status == JobStatus.COMPLETED or status == JobStatus.FAILED:
             conn.execute(
                 "UPDATE jobs SET status = ?, progress = ?, error = ?, completed_at = ? WHERE id = ?",
@@ -352,30 +500,53 @@ def update_job_status(job_id: int, status: JobStatus, progress: int = None, erro
 
 def update_job_stage(job_id: int, stage: JobStage, progress: int = 0, error: str = None, progress_detail: str = None):
     """Update job stage and progress."""
-    with get_db() as conn:
+    with get_writer() as conn:
+        if stage in (JobStage.COMPLETED, JobStage.FAILED):
+            _progress_written.pop(job_id, None)
+
         if stage == JobStage.COMPLETED:
             conn.execute(
                 "UPDATE jobs SET status = ?, stage = ?, progress = ?, error = ?, progress_detail = ?, completed_at = ? WHERE id = ?",
-                (JobStatus.COMPLETED.value, stage.value, 100, error, None, datetime.now(), job_id)
+                (_STAGE_STATUS[stage], stage.value, 100, error, None, datetime.now(), job_id)
             )
         elif stage == JobStage.FAILED:
             conn.execute(
                 "UPDATE jobs SET status = ?, stage = ?, progress = ?, error = ?, progress_detail = ?, completed_at = ? WHERE id = ?",
-                (JobStatus.FAILED.value, stage.value, progress, error, None, datetime.now(), job_id)
+                (_STAGE_STATUS[stage], stage.value, progress, error, None, datetime.now(), job_id)
             )
         else:
-            status = JobStatus.RUNNING if stage in (JobStage.DOWNLOADING, JobStage.CONVERTING) else JobStatus.PENDING
             conn.execute(
                 "UPDATE jobs SET status = ?, stage = ?, progress = ?, error = ?, progress_detail = ? WHERE id = ?",
-                (status.value, stage.value, progress, error, progress_detail, job_id)
+                (_STAGE_STATUS[stage], stage.value, progress, error, progress_detail, job_id)
             )
 
+    notify_job(stage)
+
+
+def update_job_progress(job_id: int, progress: int, progress_detail: str = None) -> bool:
+    """Update progress of a running job, throttled to one write per PROGRESS_INTERVAL.
+
+    Returns False if the update was skipped. Stage changes (including the final
+    COMPLETED/FAILED) go through update_job_stage, which always writes.
+    """
+    now = time.monotonic()
+    if now - _progress_written.get(job_id, 0.0) < PROGRESS_INTERVAL:
+        return False
+    _progress_written[job_id] = now
+
+    with get_writer() as conn:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, progress_detail = ? WHERE id = ?",
+            (progress, progress_detail, job_id)
+        )
+    return True
+
 
 def get_job(job_id: int) -> Optional[Job]:
     """Get a job by ID."""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
         ).fetchone()
 
         if row:
@@ -385,7 +556,7 @@ def get_job(job_id: int) -> Optional[Job]:
 
 def delete_job(job_id: int, user_id: int) -> bool:
     """Delete a job. Returns True if deleted."""
-    with get_db() as conn:
+    with get_writer() as conn:
         cursor = conn.execute(
             "DELETE FROM jobs WHERE id = ? AND user_id = ?",
             (job_id, user_id)
@@ -395,7 +566,7 @@ def delete_job(job_id: int, user_id: int) -> bool:
 
 def delete_book(book_id: int, user_id: int) -> Optional[str]:
     """Delete a book. Returns the path if deleted, None otherwise."""
-    with get_db() as conn:
+    with get_writer() as conn:
         row = conn.execute(
             "SELECT path FROM books WHERE id = ? AND user_id = ?",
             (book_id, user_id)
@@ -406,66 +577,94 @@ def delete_book(book_id: int, user_id: int) -> Optional[str]:
                 "DELETE FROM books WHERE id = ? AND user_id = ?",
                 (book_id, user_id)
             )
-            return row["path"]
+            return row[0]
     return None
 
 
 # Library cache operations
 
 def get_library_cache(user_id: int) -> Optional[list]:
-    """Get cached library for a user. Returns None if not cached."""
+    """Get cached library for a user. Returns None if not cached.
+
+    The decoded library is kept in memory, so only the first call per process decompresses
+    and parses it. Callers get their own copy of each book dict and may modify them.
+    """
+    library = _library_memo.get(user_id)
+    if library is None:
+        with get_db() as conn:
+            row = conn.execute(
+                "SELECT library_json FROM library_cache WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+
+        if not row:
+            return None
+        data = row[0]
+        if isinstance(data, bytes):
+            data = zlib.decompress(data)  # Rows written before compression are plain TEXT
+        library = _library_memo[user_id] = orjson.loads(data)
+
+    return [dict(book) for book in library]
+
+
+def get_library_cache_age(user_id: int) -> Optional[float]:
+    """Get seconds since a user's library was cached. Returns None if not cached."""
     with get_db() as conn:
         row = conn.execute(
-            "SELECT library_json FROM library_cache WHERE user_id = ?",
+            "SELECT (julianday('now') - julianday(cached_at)) * 86400 FROM library_cache WHERE user_id = ?",
             (user_id,)
         ).fetchone()
 
         if row:
-            return json.loads(row["library_json"])
+            return row[0]
     return None
 
 
 def save_library_cache(user_id: int, library: list):
-    """Save library cache for a user."""
-    with get_db() as conn:
+    """Save library cache for a user, as zlib-compressed JSON."""
+    with get_writer() as conn:
         conn.execute(
             """INSERT INTO library_cache (user_id, library_json, cached_at)
                VALUES (?, ?, CURRENT_TIMESTAMP)
-               ON CONFLICT(user_id) DO UPDATE SET library_json = ?, cached_at = CURRENT_TIMESTAMP""",
-            (user_id, json.dumps(library), json.dumps(library))
+               ON CONFLICT(user_id) DO UPDATE SET
+                   library_json = excluded.library_json, cached_at = CURRENT_TIMESTAMP""",
+            (user_id, zlib.compress(orjson.dumps(library), LIBRARY_CACHE_COMPRESSION))
         )
+    _library_memo[user_id] = [dict(book) for book in library]
 
 
 def get_all_book_paths() -> set[str]:
     """Get all book paths from the database."""
     with get_db() as conn:
-        rows = conn.execute("SELECT path FROM books WHERE path IS NOT NULL").fetchall()
-        return {row["path"] for row in rows}
+        return {path for (path,) in conn.execute("SELECT DISTINCT path FROM books WHERE path IS NOT NULL")}
 
 
 def get_all_job_ids() -> set[int]:
     """Get all job IDs from the database."""
     with get_db() as conn:
-        rows = conn.execute("SELECT id FROM jobs").fetchall()
-        return {row["id"] for row in rows}
+        return {job_id for (job_id,) in conn.execute("SELECT id FROM jobs")}
 
 
 def reset_stuck_jobs():
     """Reset jobs stuck in active states back to pending."""
-    with get_db() as conn:
-        # Reset downloading -> pending_download
-        cursor = conn.execute(
-            "UPDATE jobs SET stage = ?, status = ?, progress = 0, progress_detail = NULL WHERE stage = ?",
-            (JobStage.PENDING_DOWNLOAD.value, JobStatus.PENDING.value, JobStage.DOWNLOADING.value)
-        )
-        download_reset = cursor.rowcount
-
-        # Reset converting -> pending_convert
-        cursor = conn.execute(
-            "UPDATE jobs SET stage = ?, status = ?, progress = 50, progress_detail = NULL WHERE stage = ?",
-            (JobStage.PENDING_CONVERT.value, JobStatus.PENDING.value, JobStage.CONVERTING.value)
-        )
-        convert_reset = cursor.rowcount
+    with get_writer() as conn:
+        # downloading -> pending_download, converting -> pending_convert, in one statement
+        stages = [stage for (stage,) in conn.execute(
+            """UPDATE jobs SET
+                   status = ?,
+                   stage = CASE stage WHEN ? THEN ? ELSE ? END,
+                   progress = CASE stage WHEN ? THEN 0 ELSE 50 END,
+                   progress_detail = NULL
+               WHERE stage IN (?, ?)
+               RETURNING stage""",
+            (
+                JobStatus.PENDING.value,
+                JobStage.DOWNLOADING.value, JobStage.PENDING_DOWNLOAD.value, JobStage.PENDING_CONVERT.value,
+                JobStage.DOWNLOADING.value,
+                JobStage.DOWNLOADING.value, JobStage.CONVERTING.value,
+            )
+        )]
 
-        if download_reset or convert_reset:
-            print(f"Reset {download_reset} stuck downloads, {convert_reset} stuck conversions")
+        if stages:
+            download_reset = stages.count(JobStage.PENDING_DOWNLOAD.value)
+            print(f"Reset {download_reset} stuck downloads, {len(stages) - download_reset} stuck conversions")
@@ -63,9 +63,17 @@ function showLoggedIn() {
 
     userInfo.innerHTML = `
         <span class="email">${currentUser.email}</span>
+        <select id="output-format" title="Format for new conversions">
+            <option value="mp3">MP3</option>
+            <option value="m4a">M4A (original audio, no re-encode)</option>
+        </select>
         <button class="btn danger" onclick="logout()">Logout</button>
     `;
 
+    const outputFormat = document.getElementById('output-format');
+    outputFormat.value = currentUser.output_format || 'mp3';
+    outputFormat.addEventListener('change', (e) => setOutputFormat(e.target.value));
+
     loadLibrary();
     loadJobs();
     loadDownloads();
@@ -105,7 +113,7 @@ async function completeLogin() {
         const data = await res.json();
 
         if (res.ok && data.success) {
-            currentUser = { email: data.email, authenticated: true };
+            currentUser = { email: data.email, authenticated: true, output_format: data.output_format };
             showLoggedIn();
         } else {
             alert('Login failed: ' + (data.detail || JSON.stringify(data)));
@@ -115,6 +123,25 @@ async function completeLogin() {
     }
 }
 
+async function setOutputFormat(outputFormat) {
+    try {
+        const res = await fetch('/api/settings', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ output_format: outputFormat })
+        });
+        const data = await res.json();
+
+        if (res.ok) {
+            currentUser.output_format = data.output_format;
+        } else {
+            alert('Failed to save setting: ' + (data.detail || JSON.stringify(data)));
+        }
+    } catch (err) {
+        alert('Failed to save setting: ' + err.message);
+    }
+}
+
 async function logout() {
     try {
         await fetch('/api/auth/logout', { method: 'POST' });
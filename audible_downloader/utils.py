@@ -0,0 +1,62 @@
+"""Helpers shared by the CLI, the web app and the background workers."""
+
+import asyncio
+import re
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+# Anything but alphanumerics (\w is str.isalnum() plus underscore), space and hyphen
+UNSAFE_FILENAME_RE = re.compile(r"[^\w -]")
+
+
+def estimate_bitrate(audio_file: Path, runtime_min: int | None) -> str | None:
+    """Estimate the source bitrate from file size and runtime (cheaper than an ffprobe pass)."""
+    if not runtime_min:
+        return None
+    kbps = audio_file.stat().st_size * 8 // (runtime_min * 60 * 1000)
+    return f"{kbps}k" if kbps else None
+
+
+def create_http_client(max_connections: int, headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+    """Create an HTTP/2 client for audio and cover downloads, shared across a whole run."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2),
+        timeout=httpx.Timeout(30.0, read=None),
+        headers=headers,
+    )
+
+
+async def stream_to_file(
+    resp: httpx.Response,
+    write: Callable[[bytes], object],
+    chunk_size: int,
+    on_chunk: Callable[[int], Awaitable[None]] | None = None,
+) -> int:
+    """Stream a response body through write, returning the number of bytes received.
+
+    Each chunk is written in a thread while the next one is read, so disk writeback doesn't
+    stall the stream. on_chunk gets the running byte count after every chunk.
+    """
+    # Nothing to decode on an identity response, so skip httpx's decoder and re-chunking
+    if resp.headers.get("content-encoding", "identity") == "identity":
+        chunks = resp.aiter_raw(chunk_size=chunk_size)
+    else:
+        chunks = resp.aiter_bytes(chunk_size=chunk_size)
+
+    received = 0
+    pending_write = None
+    try:
+        async for chunk in chunks:
+            if pending_write:
+                await pending_write
+            pending_write = asyncio.create_task(asyncio.to_thread(write, chunk))
+            received += len(chunk)
+            if on_chunk:
+                await on_chunk(received)
+    finally:
+        if pending_write:
+            await pending_write
+    return received
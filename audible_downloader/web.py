@@ -2,15 +2,19 @@
 
 import asyncio
 import base64
+import functools
 import json
 import os
+import re
 import secrets
+import shutil
 from pathlib import Path
 from typing import Optional
 from urllib.parse import parse_qs
 
 import audible
 import httpx
+import orjson
 from audible.localization import Locale
 from audible.login import build_oauth_url, create_code_verifier
 from audible.register import register
@@ -22,10 +26,20 @@ from itsdangerous import URLSafeSerializer
 from audible_cli.models import Library
 
 from . import db
+from .utils import UNSAFE_FILENAME_RE
 from .worker import worker, DOWNLOADS_DIR
 
 DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
-app = FastAPI(title="Audible Downloader", debug=DEBUG)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, which also handles datetimes natively."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+app = FastAPI(title="Audible Downloader", debug=DEBUG, default_response_class=ORJSONResponse)
 
 # Session secret - persisted to survive restarts
 def get_or_create_secret():
@@ -63,12 +77,19 @@ async def shutdown():
 
 # Session helpers
 
+@functools.lru_cache(maxsize=4096)
+def _load_session(cookie: str) -> dict:
+    """Verify and decode a session cookie. Cached, since the UI sends the same cookie on every poll."""
+    return serializer.loads(cookie)
+
+
 def get_session(request: Request) -> dict:
     """Get session data from cookie."""
     cookie = request.cookies.get("session")
     if cookie:
         try:
-            return serializer.loads(cookie)
+            # Copied, since callers modify the session before setting it again
+            return dict(_load_session(cookie))
         except Exception:
             pass
     return {}
@@ -113,10 +134,27 @@ async def get_me(request: Request):
     """Get current user info."""
     user = get_current_user(request)
     if user:
-        return {"email": user.email, "authenticated": True}
+        return {"email": user.email, "authenticated": True, "output_format": user.output_format.value}
     return {"authenticated": False}
 
 
+@app.post("/api/settings")
+async def update_settings(request: Request):
+    """Update current user's settings (output_format: "mp3" or "m4a")."""
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(401, "Not authenticated")
+
+    body = await request.json()
+    try:
+        output_format = db.OutputFormat(body.get("output_format"))
+    except ValueError:
+        raise HTTPException(400, "output_format must be one of: " + ", ".join(f.value for f in db.OutputFormat))
+
+    db.set_user_output_format(user.id, output_format)
+    return {"success": True, "output_format": output_format.value}
+
+
 @app.get("/api/auth/start")
 async def auth_start(request: Request, locale: str = "us"):
     """Start Audible authentication - returns URL for OAuth."""
@@ -217,7 +255,7 @@ async def auth_callback(request: Request, response_url: str):
         session.pop("oauth_serial", None)
         session.pop("oauth_domain", None)
 
-        response = JSONResponse({"success": True, "email": name})
+        response = JSONResponse({"success": True, "email": name, "output_format": user.output_format.value})
         set_session(response, session)
         return response
 
@@ -238,10 +276,66 @@ async def logout(request: Request):
     return response
 
 
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
 def clean_html(text):
     """Strip HTML tags from text."""
-    import re
-    return re.sub(r'<[^>]+>', '', text or '')
+    return HTML_TAG_RE.sub('', text or '')
+
+
+# Cached libraries older than this are returned as-is but refreshed in the background
+LIBRARY_CACHE_MAX_AGE = 600
+
+# User id -> in-flight background library refresh (also keeps the task referenced)
+_library_refreshes: dict[int, asyncio.Task] = {}
+
+
+async def fetch_library(user: db.User, book_paths: dict, full: bool = False) -> list[dict]:
+    """Fetch a user's library from the Audible API. full=True includes series/summary."""
+    auth = audible.Authenticator.from_dict(user.auth_data)
+
+    async with audible.AsyncClient(auth=auth) as client:
+        library = await Library.from_api_full_sync(api_client=client)
+
+    books = []
+    for item in library:
+        authors = ", ".join(a["name"] for a in (item.authors or []))
+        runtime = item.runtime_length_min or 0
+        hours, mins = divmod(runtime, 60)
+
+        book_data = {
+            "asin": item.asin,
+            "title": item.full_title,
+            "author": authors,
+            "runtime": f"{hours}h {mins}m" if hours else f"{mins}m",
+            "cover": item.get_cover_url(res=500),
+            "downloaded": item.asin in book_paths,
+            "path": book_paths.get(item.asin)
+        }
+
+        # Add extended data for tinder mode
+        if full:
+            d = item._data
+            series_list = d.get('series') or []
+            book_data["series"] = series_list[0]['title'] if series_list else None
+            book_data["series_num"] = series_list[0].get('sequence') if series_list else None
+            book_data["summary"] = clean_html(d.get('merchandising_summary') or d.get('publisher_summary') or '')
+
+        books.append(book_data)
+
+    return books
+
+
+async def refresh_library_cache(user: db.User):
+    """Re-fetch a user's library into the cache, for a stale cache that was already served."""
+    try:
+        books = await fetch_library(user, db.get_user_book_paths(user.id))
+        db.save_library_cache(user.id, books)
+    except Exception as e:
+        print(f"Background library refresh failed for user {user.id}: {e}")
+    finally:
+        _library_refreshes.pop(user.id, None)
 
 
 @app.get("/api/library")
@@ -252,54 +346,27 @@ async def get_library(request: Request, refresh: bool = False, full: bool = Fals
         raise HTTPException(401, "Not authenticated")
 
     # Get existing downloaded books for this user
-    existing_books = {b.asin: b for b in db.get_user_books(user.id)}
+    book_paths = db.get_user_book_paths(user.id)
 
     # Check cache first (unless refresh requested)
     # Note: cache doesn't store full data, so skip cache if full=true
     if not refresh and not full:
         cached = db.get_library_cache(user.id)
         if cached is not None:
+            # Serve the stale cache now; the UI picks up the refreshed one on its next load
+            age = db.get_library_cache_age(user.id)
+            if (age is None or age > LIBRARY_CACHE_MAX_AGE) and user.id not in _library_refreshes:
+                _library_refreshes[user.id] = asyncio.create_task(refresh_library_cache(user))
+
             # Update downloaded status from current DB state
             for book in cached:
-                existing = existing_books.get(book["asin"])
-                book["downloaded"] = existing is not None
-                book["path"] = existing.path if existing else None
+                book["downloaded"] = book["asin"] in book_paths
+                book["path"] = book_paths.get(book["asin"])
             return {"books": cached}
 
     # Fetch from Audible API
     try:
-        auth = audible.Authenticator.from_dict(user.auth_data)
-
-        async with audible.AsyncClient(auth=auth) as client:
-            library = await Library.from_api_full_sync(api_client=client)
-
-        books = []
-        for item in library:
-            authors = ", ".join(a["name"] for a in (item.authors or []))
-            runtime = item.runtime_length_min or 0
-            hours, mins = divmod(runtime, 60)
-
-            existing = existing_books.get(item.asin)
-
-            book_data = {
-                "asin": item.asin,
-                "title": item.full_title,
-                "author": authors,
-                "runtime": f"{hours}h {mins}m" if hours else f"{mins}m",
-                "cover": item.get_cover_url(res=500),
-                "downloaded": existing is not None,
-                "path": existing.path if existing else None
-            }
-
-            # Add extended data for tinder mode
-            if full:
-                d = item._data
-                series_list = d.get('series') or []
-                book_data["series"] = series_list[0]['title'] if series_list else None
-                book_data["series_num"] = series_list[0].get('sequence') if series_list else None
-                book_data["summary"] = clean_html(d.get('merchandising_summary') or d.get('publisher_summary') or '')
-
-            books.append(book_data)
+        books = await fetch_library(user, book_paths, full)
 
         # Save to cache (without full data)
         if not full:
@@ -324,29 +391,28 @@ async def start_download(request: Request):
     if not asins:
         raise HTTPException(400, "No books selected")
 
-    # Get book titles from library
-    auth = audible.Authenticator.from_dict(user.auth_data)
-    async with audible.AsyncClient(auth=auth) as client:
-        library = await Library.from_api_full_sync(api_client=client)
+    # Get book titles from the cached library the UI was rendered from,
+    # only fetching the library from Audible if the cache is missing any of them
+    asin_to_title = {book["asin"]: book["title"] for book in db.get_library_cache(user.id) or []}
+    if any(asin not in asin_to_title for asin in asins):
+        auth = audible.Authenticator.from_dict(user.auth_data)
+        async with audible.AsyncClient(auth=auth) as client:
+            library = await Library.from_api_full_sync(api_client=client)
 
-    asin_to_title = {item.asin: item.full_title for item in library}
+        asin_to_title = {item.asin: item.full_title for item in library}
 
-    jobs = []
-    skipped = 0
-    for asin in asins:
-        title = asin_to_title.get(asin, asin)
-        job = db.create_job(user.id, asin, title)
-        if job:
-            jobs.append({
-                "id": job.id,
-                "asin": job.asin,
-                "title": job.title,
-                "status": job.status.value
-            })
-        else:
-            skipped += 1
+    created = db.create_jobs(user.id, [(asin, asin_to_title.get(asin, asin)) for asin in asins])
+    jobs = [
+        {
+            "id": job.id,
+            "asin": job.asin,
+            "title": job.title,
+            "status": job.status.value
+        }
+        for job in created
+    ]
 
-    return {"jobs": jobs, "skipped": skipped}
+    return {"jobs": jobs, "skipped": len(asins) - len(jobs)}
 
 
 @app.get("/api/jobs")
@@ -356,25 +422,8 @@ async def get_jobs(request: Request):
     if not user:
         raise HTTPException(401, "Not authenticated")
 
-    jobs = db.get_user_jobs(user.id)
-
-    return {
-        "jobs": [
-            {
-                "id": j.id,
-                "asin": j.asin,
-                "title": j.title,
-                "status": j.status.value,
-                "stage": j.stage.value,
-                "progress": j.progress,
-                "progress_detail": j.progress_detail,
-                "error": j.error,
-                "created_at": j.created_at.isoformat() if j.created_at else None,
-                "completed_at": j.completed_at.isoformat() if j.completed_at else None
-            }
-            for j in jobs
-        ]
-    }
+    # Returned as a response directly so FastAPI skips jsonable_encoder
+    return ORJSONResponse({"jobs": db.get_user_jobs_dicts(user.id)})
 
 
 @app.get("/api/books")
@@ -386,7 +435,7 @@ async def get_books(request: Request):
 
     books = db.get_user_books(user.id)
 
-    return {
+    return ORJSONResponse({
         "books": [
             {
                 "id": b.id,
@@ -394,11 +443,11 @@ async def get_books(request: Request):
                 "title": b.title,
                 "author": b.author,
                 "path": b.path,
-                "created_at": b.created_at.isoformat() if b.created_at else None
+                "created_at": b.created_at
             }
             for b in books
         ]
-    }
+    })
 
 
 @app.get("/api/download/{asin}")
@@ -413,15 +462,19 @@ async def download_book_zip(request: Request, asin: str):
         raise HTTPException(404, "Book not found")
 
     zip_file = Path(book.path) / "audiobook.zip"
-    if not zip_file.exists():
+    try:
+        # Handed to FileResponse, which would otherwise stat the file again
+        zip_stat = zip_file.stat()
+    except FileNotFoundError:
         raise HTTPException(404, "Zip file not found")
 
-    safe_title = "".join(c for c in book.title if c.isalnum() or c in " -_").strip()[:50]
+    safe_title = UNSAFE_FILENAME_RE.sub('', book.title).strip()[:50]
 
     return FileResponse(
         zip_file,
         media_type="application/zip",
-        filename=f"{safe_title}.zip"
+        filename=f"{safe_title}.zip",
+        stat_result=zip_stat
     )
 
 
@@ -447,7 +500,6 @@ async def delete_book(request: Request, book_id: int):
     path = db.delete_book(book_id, user.id)
     if path:
         # Delete files from disk
-        import shutil
         book_path = Path(path)
         if book_path.exists():
             shutil.rmtree(book_path)
@@ -1,7 +1,7 @@
 """Background workers for processing download and convert jobs."""
 
 import asyncio
-import json
+import functools
 import os
 import shutil
 import subprocess
@@ -10,16 +10,43 @@ import time
 import zipfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterator
 
 import audible
 import httpx
+import orjson
 
 from audible_cli.models import Library
 
 from . import db
+from .utils import UNSAFE_FILENAME_RE, create_http_client, estimate_bitrate, stream_to_file
 
 DOWNLOADS_DIR = Path("data/downloads")
 
+# Idle workers are woken as soon as this process queues a job; jobs queued by other
+# processes are found by re-checking, backing off from POLL_INTERVAL to MAX_POLL_INTERVAL
+POLL_INTERVAL = 2
+MAX_POLL_INTERVAL = 10
+
+# Encodes run at lower CPU priority, so a conversion using every core doesn't starve the web server
+NICE = ["nice", "-n", "10"] if shutil.which("nice") else []
+
+# Audio download read size; large reads keep per-chunk Python overhead negligible
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Seconds the download worker reuses a user's fetched library across jobs
+LIBRARY_CACHE_TTL = 300
+
+# Block size for copying files into the book zip; with stored entries the zip is
+# copy-bound, so big blocks keep the per-block CRC/write loop out of the way
+ZIP_COPY_BUFSIZE = 1024 * 1024
+
+# Audio and covers are already compressed; identity encoding lets the raw stream be written as-is
+DOWNLOAD_HEADERS = {
+    "User-Agent": "Audible/671 CFNetwork/1240.0.4 Darwin/20.6.0",
+    "Accept-Encoding": "identity",
+}
+
 
 def cleanup_orphaned_directories():
     """Remove download directories that don't have corresponding jobs or books in the database."""
@@ -30,22 +57,24 @@ def cleanup_orphaned_directories():
     known_job_ids = db.get_all_job_ids()
     removed = 0
 
-    for item in DOWNLOADS_DIR.iterdir():
-        if not item.is_dir():
-            continue
+    # scandir entries carry the file type from the directory listing, so no stat per entry
+    with os.scandir(DOWNLOADS_DIR) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
 
-        # Check if this is a job directory (numeric name)
-        if item.name.isdigit():
-            job_id = int(item.name)
-            if job_id in known_job_ids or str(item) in known_paths:
-                continue  # Active job or completed book
-        else:
-            # Legacy user directory structure - skip for now
-            continue
+            # Check if this is a job directory (numeric name)
+            if entry.name.isdigit():
+                job_id = int(entry.name)
+                if job_id in known_job_ids or entry.path in known_paths:
+                    continue  # Active job or completed book
+            else:
+                # Legacy user directory structure - skip for now
+                continue
 
-        print(f"Removing orphaned directory: {item}")
-        shutil.rmtree(item)
-        removed += 1
+            print(f"Removing orphaned directory: {entry.path}")
+            shutil.rmtree(entry.path)
+            removed += 1
 
     if removed:
         print(f"Cleaned up {removed} orphaned directories")
@@ -57,6 +86,12 @@ class DownloadWorker:
     def __init__(self):
         self._running = False
         self._thread = None
+        # User id -> (expiry, {asin: library item}), so queued books don't each refetch the whole library
+        self._library_cache: dict[int, tuple[float, dict]] = {}
+        # Event loop kept for the life of the worker thread, and the HTTP client bound to it,
+        # so connections to the CDN are reused from one job to the next
+        self._runner: asyncio.Runner | None = None
+        self._http: httpx.AsyncClient | None = None
 
     def start(self):
         if self._running:
@@ -67,17 +102,30 @@ class DownloadWorker:
 
     def stop(self):
         self._running = False
+        db.notify_job(db.JobStage.PENDING_DOWNLOAD)  # Wake _run if it's waiting for a job
         if self._thread:
             self._thread.join(timeout=5)
 
     def _run(self):
+        with asyncio.Runner() as self._runner:
+            try:
+                self._poll()
+            finally:
+                if self._http:
+                    self._runner.run(self._http.aclose())
+                    self._http = None
+
+    def _poll(self):
+        idle_wait = POLL_INTERVAL
         while self._running:
             try:
                 job = db.get_job_by_stage(db.JobStage.PENDING_DOWNLOAD)
                 if job:
                     self._process_job(job)
+                    idle_wait = POLL_INTERVAL
                 else:
-                    time.sleep(2)
+                    db.wait_for_job(db.JobStage.PENDING_DOWNLOAD, idle_wait)
+                    idle_wait = min(idle_wait * 2, MAX_POLL_INTERVAL)
             except Exception as e:
                 print(f"Download worker error: {e}")
                 time.sleep(5)
@@ -91,7 +139,7 @@ class DownloadWorker:
             if not user:
                 raise Exception("User not found")
 
-            asyncio.run(self._download(job, user))
+            self._runner.run(self._download(job, user))
 
             # Move to convert queue
             db.update_job_stage(job.id, db.JobStage.PENDING_CONVERT, progress=50)
@@ -102,28 +150,27 @@ class DownloadWorker:
             db.update_job_stage(job.id, db.JobStage.FAILED, error=str(e))
 
     async def _download(self, job: db.Job, user: db.User):
+        # Database writes go through asyncio.to_thread so a slow commit doesn't stall the event loop
         auth = audible.Authenticator.from_dict(user.auth_data)
 
         book_dir = DOWNLOADS_DIR / str(job.id)
         book_dir.mkdir(parents=True, exist_ok=True)
 
-        db.update_job_stage(job.id, db.JobStage.DOWNLOADING, progress=5)
-
-        async with audible.AsyncClient(auth=auth) as client:
-            library = await Library.from_api_full_sync(api_client=client)
+        await asyncio.to_thread(db.update_job_stage, job.id, db.JobStage.DOWNLOADING, progress=5)
 
-            item = None
-            for lib_item in library:
-                if lib_item.asin == job.asin:
-                    item = lib_item
-                    break
+        # Created on first use, inside the worker's event loop
+        if self._http is None:
+            self._http = create_http_client(max_connections=20, headers=DOWNLOAD_HEADERS)
+        http = self._http
 
+        async with audible.AsyncClient(auth=auth) as client:
+            item = await self._get_library_item(job.user_id, client, job.asin)
             if not item:
                 raise Exception(f"Book {job.asin} not found in library")
 
             item._client = client
 
-            db.update_job_stage(job.id, db.JobStage.DOWNLOADING, progress=10)
+            await asyncio.to_thread(db.update_job_stage, job.id, db.JobStage.DOWNLOADING, progress=10)
 
             # Get download URL (AAXC first, then AAX)
             is_aaxc = False
@@ -132,40 +179,45 @@ class DownloadWorker:
                 is_aaxc = True
 
                 voucher_file = book_dir / "voucher.json"
-                with open(voucher_file, "w") as f:
-                    json.dump(license_resp, f, indent=2)
+                voucher_file.write_bytes(orjson.dumps(license_resp, option=orjson.OPT_INDENT_2))
 
             except Exception:
                 url, codec = await item.get_aax_url(quality="best")
 
-            db.update_job_stage(job.id, db.JobStage.DOWNLOADING, progress=15)
+            await asyncio.to_thread(db.update_job_stage, job.id, db.JobStage.DOWNLOADING, progress=15)
 
             # Download audio file
             ext = "aaxc" if is_aaxc else "aax"
             audio_file = book_dir / f"audio.{ext}"
 
-            download_headers = {"User-Agent": "Audible/671 CFNetwork/1240.0.4 Darwin/20.6.0"}
-
             if not audio_file.exists():
-                async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None), headers=download_headers) as http:
-                    async with http.stream("GET", str(url), follow_redirects=True) as resp:
-                        resp.raise_for_status()
-
-                        total = int(resp.headers.get("content-length", 0))
-                        downloaded = 0
-
-                        with open(audio_file, "wb") as f:
-                            async for chunk in resp.aiter_bytes(chunk_size=65536):
-                                f.write(chunk)
-                                downloaded += len(chunk)
-                                if total > 0:
-                                    pct = 15 + int((downloaded / total) * 30)
-                                    mb_down = downloaded / (1024 * 1024)
-                                    mb_total = total / (1024 * 1024)
-                                    detail = f"{mb_down:.1f} / {mb_total:.1f} MB"
-                                    db.update_job_stage(job.id, db.JobStage.DOWNLOADING, progress=pct, progress_detail=detail)
-
-            db.update_job_stage(job.id, db.JobStage.DOWNLOADING, progress=45)
+                async with http.stream("GET", str(url), follow_redirects=True) as resp:
+                    resp.raise_for_status()
+
+                    total = int(resp.headers.get("content-length", 0))
+                    last_pct = 15
+
+                    async def on_chunk(downloaded: int):
+                        nonlocal last_pct
+                        if total <= 0:
+                            return
+                        # Only write when the percentage moves (and update_job_progress
+                        # also rate-limits), not once per chunk
+                        pct = 15 + int((downloaded / total) * 30)
+                        if pct == last_pct:
+                            return
+                        mb_down = downloaded / (1024 * 1024)
+                        mb_total = total / (1024 * 1024)
+                        detail = f"{mb_down:.1f} / {mb_total:.1f} MB"
+                        if await asyncio.to_thread(db.update_job_progress, job.id, pct, progress_detail=detail):
+                            last_pct = pct
+
+                    # Chunks bigger than the buffer go straight through BufferedWriter,
+                    # which also retries short writes
+                    with open(audio_file, "wb") as f:
+                        await stream_to_file(resp, f.write, DOWNLOAD_CHUNK_SIZE, on_chunk)
+
+            await asyncio.to_thread(db.update_job_stage, job.id, db.JobStage.DOWNLOADING, progress=45)
 
             # Get chapter info
             try:
@@ -173,8 +225,7 @@ class DownloadWorker:
                 chapter_info = metadata.get("content_metadata", {}).get("chapter_info", {})
                 if chapter_info:
                     chapters_file = book_dir / "chapters.json"
-                    with open(chapters_file, "w") as f:
-                        json.dump(chapter_info, f, indent=2)
+                    chapters_file.write_bytes(orjson.dumps(chapter_info, option=orjson.OPT_INDENT_2))
             except Exception:
                 pass
 
@@ -184,28 +235,42 @@ class DownloadWorker:
                 cover_file = book_dir / "cover.jpg"
                 if not cover_file.exists():
                     try:
-                        async with httpx.AsyncClient() as http:
-                            resp = await http.get(cover_url)
-                            cover_file.write_bytes(resp.content)
+                        resp = await http.get(cover_url)
+                        cover_file.write_bytes(resp.content)
                     except Exception:
                         pass
 
             # Save metadata for convert worker
             meta_file = book_dir / "meta.json"
             authors = ", ".join(a["name"] for a in (item.authors or []))
-            with open(meta_file, "w") as f:
-                json.dump({
-                    "asin": job.asin,
-                    "title": job.title,
-                    "authors": authors,
-                    "is_aaxc": is_aaxc,
-                    "audio_file": str(audio_file),
-                    "book_dir": str(book_dir),
-                }, f)
+            meta_file.write_bytes(orjson.dumps({
+                "asin": job.asin,
+                # The job title is the bare ASIN when /api/download couldn't look it up
+                "title": item.full_title or job.title,
+                "authors": authors,
+                "is_aaxc": is_aaxc,
+                "runtime_length_min": item.runtime_length_min,
+                "audio_file": str(audio_file),
+                "book_dir": str(book_dir),
+            }))
+
+    async def _get_library_item(self, user_id: int, client: audible.AsyncClient, asin: str):
+        """Find a book in the user's library. The library is reused for LIBRARY_CACHE_TTL seconds,
+        and refetched early only if the book is missing (e.g. bought after it was cached)."""
+        cached = self._library_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            item = cached[1].get(asin)
+            if item:
+                return item
+
+        library = await Library.from_api_full_sync(api_client=client)
+        by_asin = {lib_item.asin: lib_item for lib_item in library}
+        self._library_cache[user_id] = (time.monotonic() + LIBRARY_CACHE_TTL, by_asin)
+        return by_asin.get(asin)
 
 
 class ConvertWorker:
-    """Worker that converts downloaded audiobooks to MP3."""
+    """Worker that converts downloaded audiobooks to MP3 or M4A."""
 
     def __init__(self):
         self._running = False
@@ -220,17 +285,21 @@ class ConvertWorker:
 
     def stop(self):
         self._running = False
+        db.notify_job(db.JobStage.PENDING_CONVERT)  # Wake _run if it's waiting for a job
         if self._thread:
             self._thread.join(timeout=5)
 
     def _run(self):
+        idle_wait = POLL_INTERVAL
         while self._running:
             try:
                 job = db.get_job_by_stage(db.JobStage.PENDING_CONVERT)
                 if job:
                     self._process_job(job)
+                    idle_wait = POLL_INTERVAL
                 else:
-                    time.sleep(2)
+                    db.wait_for_job(db.JobStage.PENDING_CONVERT, idle_wait)
+                    idle_wait = min(idle_wait * 2, MAX_POLL_INTERVAL)
             except Exception as e:
                 print(f"Convert worker error: {e}")
                 time.sleep(5)
@@ -251,15 +320,14 @@ class ConvertWorker:
             if not meta_file.exists():
                 raise Exception("Metadata file not found")
 
-            with open(meta_file) as f:
-                meta = json.load(f)
+            meta = orjson.loads(meta_file.read_bytes())
 
             audio_file = Path(meta["audio_file"])
             is_aaxc = meta["is_aaxc"]
             authors = meta["authors"]
 
-            # Convert to MP3
-            self._convert_to_mp3(job.id, book_dir, audio_file, is_aaxc, user.auth_data)
+            # Split into chapter files in the user's output format
+            self._convert(job.id, book_dir, audio_file, is_aaxc, user.auth_data, meta, user.output_format)
 
             db.update_job_stage(job.id, db.JobStage.CONVERTING, progress=95)
 
@@ -270,7 +338,7 @@ class ConvertWorker:
             self._cleanup(book_dir)
 
             # Save to database
-            db.save_book(user.id, job.asin, job.title, authors, str(book_dir))
+            db.save_book(user.id, job.asin, meta.get("title", job.title), authors, str(book_dir))
 
             db.update_job_stage(job.id, db.JobStage.COMPLETED, progress=100)
             print(f"Job {job.id} completed")
@@ -279,16 +347,19 @@ class ConvertWorker:
             print(f"Job {job.id} convert failed: {e}")
             db.update_job_stage(job.id, db.JobStage.FAILED, error=str(e))
 
-    def _convert_to_mp3(self, job_id: int, book_dir: Path, audio_file: Path, is_aaxc: bool, auth_data: dict):
-        mp3_dir = book_dir / "mp3"
-        mp3_dir.mkdir(exist_ok=True)
+    def _convert(
+        self, job_id: int, book_dir: Path, audio_file: Path, is_aaxc: bool, auth_data: dict, meta: dict,
+        output_format: db.OutputFormat = db.OutputFormat.MP3,
+    ):
+        """Split the book into per-chapter files. M4A output copies the AAC audio as-is instead of encoding MP3."""
+        out_dir = book_dir / "out"
+        out_dir.mkdir(exist_ok=True)
 
         # Build decryption parameters
         if is_aaxc:
             voucher_file = book_dir / "voucher.json"
             if voucher_file.exists():
-                with open(voucher_file) as f:
-                    voucher = json.load(f)
+                voucher = orjson.loads(voucher_file.read_bytes())
                 lr = voucher.get("content_license", {}).get("license_response", {})
                 key = lr.get("key")
                 iv = lr.get("iv")
@@ -309,31 +380,57 @@ class ConvertWorker:
         chapters_file = book_dir / "chapters.json"
         chapters = []
         if chapters_file.exists():
-            with open(chapters_file) as f:
-                data = json.load(f)
-                chapters = _flatten_chapters(data.get("chapters", []))
-
-        # Probe for metadata
-        probe_cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", *decrypt_params, "-i", str(audio_file)
-        ]
-        try:
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-            probe_data = json.loads(result.stdout)
-            format_info = probe_data.get("format", {})
-            tags = format_info.get("tags", {})
-            bitrate = format_info.get("bit_rate", "128000")
-            bitrate = f"{int(bitrate) // 1000}k"
-        except Exception:
-            tags = {}
-            bitrate = "128k"
-
-        artist = tags.get("artist", "")
-        album = tags.get("album", "")
+            data = orjson.loads(chapters_file.read_bytes())
+            chapters = list(_flatten_chapters(data.get("chapters", [])))
+
+        # Only MP3 re-encodes; M4A copies the audio stream, so it needs no source bitrate
+        reencode = output_format == db.OutputFormat.MP3
+        bitrate = estimate_bitrate(audio_file, meta.get("runtime_length_min")) if reencode else None
+
+        # Older meta.json files may carry the ASIN as the title; ffprobe reads the real album tag
+        has_meta = meta.get("authors") and meta.get("title") != meta.get("asin")
+
+        if has_meta and (bitrate or not reencode):
+            # The download worker saved everything from the Audible API - no need to decrypt the file with ffprobe
+            artist = meta["authors"]
+            album = meta["title"]
+        else:
+            # Probe for metadata
+            probe_cmd = [
+                "ffprobe", "-v", "quiet", "-print_format", "json",
+                "-show_format", *decrypt_params, "-i", str(audio_file)
+            ]
+            try:
+                result = subprocess.run(probe_cmd, capture_output=True, check=True)
+                probe_data = orjson.loads(result.stdout)
+                format_info = probe_data.get("format", {})
+                tags = format_info.get("tags", {})
+                if reencode:
+                    bitrate = f"{int(format_info.get('bit_rate', '128000')) // 1000}k"
+            except Exception:
+                tags = {}
+                if reencode:
+                    bitrate = "128k"
+
+            artist = tags.get("artist", "")
+            album = tags.get("album", "")
+
+        if reencode:
+            codec_args = ["-codec:a", "libmp3lame", "-ab", bitrate]
+        else:
+            codec_args = ["-codec:a", "copy"]
+        ext = output_format.value
 
         if chapters:
             total_chapters = len(chapters)
+
+            # Loop-invariant parts of the per-chapter ffmpeg command
+            output_args = [
+                "-vn", *codec_args,
+                "-map_metadata", "-1",
+                "-metadata", f"artist={artist}",
+                "-metadata", f"album={album}",
+            ]
             completed = [0]  # Use list to allow mutation in nested function
             lock = threading.Lock()
 
@@ -344,35 +441,33 @@ class ConvertWorker:
                 start_ms = chapter.get("start_offset_ms", 0)
                 length_ms = chapter.get("length_ms", 0)
                 start_sec = start_ms / 1000
-                end_sec = (start_ms + length_ms) / 1000
-
-                output_file = mp3_dir / f"{i:03d} - {safe_title}.mp3"
                 expected_duration = length_ms / 1000
+
+                output_file = out_dir / f"{i:03d} - {safe_title}.{ext}"
                 if output_file.exists():
-                    actual_duration = _get_mp3_duration(output_file)
+                    actual_duration = _get_duration(output_file)
                     if actual_duration and actual_duration >= expected_duration - 1:
                         return i  # Already done and complete
                     # Incomplete file - delete and reconvert
                     output_file.unlink()
 
+                # -ss/-t before -i seek the input, so each chapter only decrypts and decodes
+                # its own span instead of everything from the start of the book
                 cmd = [
-                    "ffmpeg", "-v", "error",
-                    *decrypt_params,
-                    "-i", str(audio_file),
+                    *NICE, "ffmpeg", "-v", "error", *decrypt_params,
                     "-ss", str(start_sec),
-                    "-to", str(end_sec),
-                    "-vn", "-codec:a", "libmp3lame", "-ab", bitrate,
-                    "-map_metadata", "-1",
+                    "-t", str(expected_duration),
+                    "-i", str(audio_file),
+                    *output_args,
                     "-metadata", f"title={chapter_title}",
-                    "-metadata", f"artist={artist}",
-                    "-metadata", f"album={album}",
                     "-metadata", f"track={i}/{total_chapters}",
                     "-y", str(output_file)
                 ]
                 subprocess.run(cmd, check=True)
                 return i
 
-            # Use CPU count for parallelism, default to 4
+            # Use CPU count for parallelism, default to 4. Threads are enough: each chapter
+            # is its own ffmpeg process, so the encodes already run in parallel across cores
             max_workers = os.cpu_count() or 4
 
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -387,67 +482,77 @@ class ConvertWorker:
                         completed[0] += 1
                         pct = 50 + int((completed[0] / total_chapters) * 45)
                         detail = f"Chapter {completed[0]} / {total_chapters}"
-                        db.update_job_stage(job_id, db.JobStage.CONVERTING, progress=pct, progress_detail=detail)
+                        db.update_job_progress(job_id, pct, progress_detail=detail)
         else:
-            output_file = mp3_dir / "audiobook.mp3"
+            output_file = out_dir / f"audiobook.{ext}"
             cmd = [
-                "ffmpeg", "-v", "error",
+                *NICE, "ffmpeg", "-v", "error",
                 *decrypt_params,
                 "-i", str(audio_file),
-                "-vn", "-codec:a", "libmp3lame", "-ab", bitrate,
+                "-vn", *codec_args,
                 "-y", str(output_file)
             ]
             subprocess.run(cmd, check=True)
 
     def _create_zip(self, book_dir: Path):
-        mp3_dir = book_dir / "mp3"
+        out_dir = book_dir / "out"
         zip_file = book_dir / "audiobook.zip"
 
         if zip_file.exists():
             zip_file.unlink()
 
-        with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for file in mp3_dir.iterdir():
+        # Stored, not deflated: MP3/M4A and JPEG are already compressed, so deflate only burns CPU
+        with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for file in out_dir.iterdir():
                 if file.is_file():
-                    zf.write(file, file.name)
+                    _zip_write(zf, file, file.name)
 
             cover = book_dir / "cover.jpg"
             if cover.exists():
-                zf.write(cover, "cover.jpg")
+                _zip_write(zf, cover, "cover.jpg")
 
     def _cleanup(self, book_dir: Path):
         """Remove intermediate files after zip is created, keep only zip and cover."""
         keep = {"audiobook.zip", "cover.jpg"}
-        for item in book_dir.iterdir():
-            if item.name in keep:
-                continue
-            if item.is_dir():
-                shutil.rmtree(item)
-            else:
-                item.unlink()
+        with os.scandir(book_dir) as entries:
+            for entry in entries:
+                if entry.name in keep:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+
+def _zip_write(zf: zipfile.ZipFile, file: Path, arcname: str):
+    """Add a file to a zip, copying in ZIP_COPY_BUFSIZE blocks (ZipFile.write uses 8 KiB)."""
+    zinfo = zipfile.ZipInfo.from_file(file, arcname)
+    zinfo.compress_type = zf.compression
+    with open(file, "rb") as src, zf.open(zinfo, "w") as dest:
+        shutil.copyfileobj(src, dest, ZIP_COPY_BUFSIZE)
 
 
+@functools.lru_cache(maxsize=2048)
 def _safe_filename(name: str) -> str:
     """Create a safe filename from a string."""
-    return "".join(c for c in name if c.isalnum() or c in " -_").strip()[:100]
+    return UNSAFE_FILENAME_RE.sub("", name).strip()[:100]
 
 
-def _get_mp3_duration(file_path: Path) -> float | None:
-    """Get actual duration of MP3 file in seconds using ffprobe."""
+def _get_duration(file_path: Path) -> float | None:
+    """Get actual duration of a converted chapter file in seconds using ffprobe."""
     try:
         result = subprocess.run(
             ["ffprobe", "-v", "error", "-show_entries", "format=duration",
              "-of", "csv=p=0", str(file_path)],
-            capture_output=True, text=True, check=True
+            capture_output=True, check=True
         )
-        return float(result.stdout.strip())
+        return float(result.stdout)
     except Exception:
         return None
 
 
-def _flatten_chapters(chapters: list, parent_title: str = None) -> list:
-    """Flatten nested chapter structure into a single list."""
-    result = []
+def _flatten_chapters(chapters: list, parent_title: str = None) -> Iterator[dict]:
+    """Flatten nested chapter structure, yielding chapters in order."""
     for chapter in chapters:
         title = chapter.get("title", "")
         # Prepend parent title if exists
@@ -469,17 +574,16 @@ def _flatten_chapters(chapters: list, parent_title: str = None) -> list:
                     "start_offset_ms": parent_start,
                     "length_ms": intro_length,
                 }
-                result.append(intro_chapter)
+                yield intro_chapter
 
             # Recursively flatten children with parent title
-            result.extend(_flatten_chapters(chapter["chapters"], full_title))
+            yield from _flatten_chapters(chapter["chapters"], full_title)
         else:
             # Leaf chapter - add with full title
-            result.append({
+            yield {
                 **chapter,
                 "title": full_title,
-            })
-    return result
+            }
 
 
 class Worker:
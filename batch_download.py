@@ -100,12 +100,12 @@ def main():
             print("Aborted.")
             return
 
-    # Queue downloads
+    # Queue downloads (one transaction for the whole batch)
+    created = {job.asin for job in db.create_jobs(user_id, [(book['asin'], book['title']) for book in to_download])}
     queued = 0
     skipped = 0
     for book in to_download:
-        job = db.create_job(user_id, book['asin'], book['title'])
-        if job:
+        if book['asin'] in created:
             queued += 1
             print(f"Queued: {book['title'][:50]}")
         else: